@@ -0,0 +1,175 @@
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+from random import Random
+import json
+import re
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+EPOCH = datetime(1970, 1, 1)
+
+
+def tokens(igc, cell=0.005, bucket=300):
+    """
+    quantizes the valid positions of a track into a set of (time bucket, latitude cell, longitude cell) tokens.
+    cell is in degrees, bucket in seconds. trimming a track or changing its sample rate only removes tokens.
+    pilots flying together in a gaggle share most tokens, tell them apart with the pilot (see same_pilot).
+    """
+    result = set()
+    for record in igc.b_records:
+        if record.validity != 'A':
+            continue
+        result.add((
+            int((record.datetime - EPOCH).total_seconds() // bucket),
+            int(record.point.latitude // cell),
+            int(record.point.longitude // cell)
+        ))
+    return result
+
+
+def minhash(values, permutations=128, seed=1):
+    """
+    calculates the minhash signature of a set of tokens.
+    """
+    coefficients = __coefficients(permutations, seed)
+    hashes = [__token_hash(value) for value in values]
+    if not hashes:
+        return tuple([MAX_HASH] * permutations)
+    return tuple(min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes) for a, b in coefficients)
+
+
+def fingerprint(igc, cell=0.005, bucket=300, permutations=128):
+    return minhash(tokens(igc, cell, bucket), permutations)
+
+
+def empty(signature):
+    """
+    signatures of tracks without valid fixes carry no information and would match each other.
+    """
+    return all(value == MAX_HASH for value in signature)
+
+
+def similarity(start, end):
+    """
+    estimates the jaccard similarity of the two token sets behind the signatures.
+    """
+    if len(start) != len(end):
+        raise Exception('Unable to compare fingerprints of different length!')
+    return sum(1 for a, b in zip(start, end) if a == b) / len(start)
+
+
+def pilot_words(pilot):
+    """
+    normalises a pilot name into a set of lower case words, unknown pilots ('NKN') become the empty set.
+    """
+    words = frozenset(re.findall(r'\w+', pilot.lower()))
+    return frozenset() if words == {'nkn'} else words
+
+
+def same_pilot(start, end):
+    """
+    pilot names match if the words of one contain the words of the other, i.e. 'Mimo Moratti'
+    and 'Michael Mimo Moratti'. unknown pilots match everyone.
+    """
+    start = pilot_words(start)
+    end = pilot_words(end)
+    return not start or not end or start <= end or end <= start
+
+
+@lru_cache(maxsize=None)
+def __coefficients(permutations, seed):
+    generator = Random(seed)
+    return tuple((generator.randint(1, MERSENNE_PRIME - 1), generator.randint(0, MERSENNE_PRIME - 1))
+                 for _ in range(permutations))
+
+
+def __token_hash(token):
+    value = 0
+    for part in token:
+        value = (value * 1000003 + (part & 0xffffffff)) & 0xffffffffffffffff
+    return value
+
+
+class FingerprintIndex:
+    """
+    locality sensitive hashing index over minhash signatures.
+    the signature is split into bands, flights sharing any band with a query become candidates.
+    candidates of a different pilot are dropped, otherwise gaggle flights would look like re-uploads.
+    empty signatures (see empty) are neither indexed nor matched.
+    """
+
+    def __init__(self, bands=32, rows=4):
+        self.bands = bands
+        self.rows = rows
+        self.fingerprints_ = dict()
+        self.pilots_ = dict()
+        self.buckets_ = [defaultdict(list) for _ in range(bands)]
+
+    def __len__(self):
+        return len(self.fingerprints_)
+
+    def add(self, key, signature, pilot='NKN'):
+        self.__check(signature)
+        self.remove(key)
+        if empty(signature):
+            return
+        self.fingerprints_[key] = signature
+        self.pilots_[key] = pilot
+        for band, value in enumerate(self.__bands(signature)):
+            self.buckets_[band][value].append(key)
+
+    def remove(self, key):
+        if key not in self.fingerprints_:
+            return
+        for band, value in enumerate(self.__bands(self.fingerprints_.pop(key))):
+            self.buckets_[band][value].remove(key)
+            if not self.buckets_[band][value]:
+                del self.buckets_[band][value]
+        del self.pilots_[key]
+
+    def candidates(self, signature):
+        self.__check(signature)
+        result = set()
+        if empty(signature):
+            return result
+        for band, value in enumerate(self.__bands(signature)):
+            result.update(self.buckets_[band].get(value, ()))
+        return result
+
+    def query(self, signature, threshold=0.5, pilot='NKN'):
+        """
+        delivers the stored flights of the same pilot similar to the signature as a list of (key, similarity)
+        sorted by similarity.
+        """
+        result = list()
+        for key in self.candidates(signature):
+            if not same_pilot(pilot, self.pilots_[key]):
+                continue
+            value = similarity(signature, self.fingerprints_[key])
+            if value >= threshold:
+                result.append((key, value))
+        return sorted(result, key=lambda entry: entry[1], reverse=True)
+
+    def save(self, file):
+        with open(file, 'w') as output:
+            json.dump({'bands': self.bands, 'rows': self.rows, 'fingerprints': self.fingerprints_,
+                       'pilots': self.pilots_}, output)
+
+    @staticmethod
+    def load(file):
+        with open(file, 'r') as data:
+            stored = json.load(data)
+        index = FingerprintIndex(stored['bands'], stored['rows'])
+        for key, signature in stored['fingerprints'].items():
+            index.add(key, tuple(signature), stored['pilots'][key])
+        return index
+
+    def __bands(self, signature):
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows]
+
+    def __check(self, signature):
+        if len(signature) != self.bands * self.rows:
+            raise Exception('Fingerprint length {} does not match {} bands of {} rows!'.format(
+                len(signature), self.bands, self.rows))
@@ -0,0 +1,107 @@
+import unittest
+from igc import parse, Igc
+from fingerprint import fingerprint, similarity, same_pilot, FingerprintIndex
+
+
+def copy(igc, b_records, pilot=None):
+    return Igc(b_records[0].datetime, pilot or igc.pilot, igc.glider, igc.instrument, b_records)
+
+
+class Fingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.igc = parse('../test/2015-07-09-Wispile.igc')
+        self.signature = fingerprint(self.igc)
+
+    def test_identical(self):
+        self.assertEqual(1.0, similarity(self.signature, fingerprint(self.igc)))
+
+    def test_trimmed(self):
+        records = self.igc.b_records
+        trimmed = copy(self.igc, records[len(records) // 10:-len(records) // 10])
+        self.assertGreater(similarity(self.signature, fingerprint(trimmed)), 0.6)
+
+    def test_sample_rate(self):
+        resampled = copy(self.igc, self.igc.b_records[::5])
+        self.assertGreater(similarity(self.signature, fingerprint(resampled)), 0.8)
+
+    def test_other_instrument(self):
+        other = parse('../test/150709_Mimo Moratti_01.igc')
+        self.assertGreater(similarity(self.signature, fingerprint(other)), 0.8)
+
+    def test_different_flight(self):
+        other = parse('../test/150710_Mimo Moratti_01.igc')
+        self.assertLess(similarity(self.signature, fingerprint(other)), 0.1)
+
+
+class Pilot(unittest.TestCase):
+
+    def test_same_pilot(self):
+        self.assertTrue(same_pilot('Michael Mimo Moratti', 'Mimo Moratti    '))
+        self.assertTrue(same_pilot('NKN', 'Mimo Moratti'))
+        self.assertFalse(same_pilot('Mimo Moratti', 'Chrigel Maurer'))
+
+
+class Index(unittest.TestCase):
+
+    def test_query(self):
+        index = FingerprintIndex()
+        for name in ['150507_Mimo Moratti_01', '150710_Mimo Moratti_01', '2015-07-09-Wispile', '2015-08-07-Fiesch']:
+            igc = parse('../test/{}.igc'.format(name))
+            index.add(name, fingerprint(igc), igc.pilot)
+        self.assertEqual(4, len(index))
+
+        igc = parse('../test/2015-07-09-Wispile.igc')
+        upload = copy(igc, igc.b_records[100:-100:3])
+        result = index.query(fingerprint(upload), pilot=upload.pilot)
+        self.assertEqual(['2015-07-09-Wispile'], [key for key, _ in result])
+
+        other_instrument = parse('../test/150709_Mimo Moratti_01.igc')
+        result = index.query(fingerprint(other_instrument), pilot=other_instrument.pilot)
+        self.assertEqual(['2015-07-09-Wispile'], [key for key, _ in result])
+
+    def test_gaggle(self):
+        igc = parse('../test/2015-07-09-Wispile.igc')
+        gaggle = copy(igc, [record._replace(point=record.point._replace(latitude=record.point.latitude + 0.0003))
+                            for record in igc.b_records[::2]], 'Chrigel Maurer')
+        self.assertGreater(similarity(fingerprint(igc), fingerprint(gaggle)), 0.5)
+
+        index = FingerprintIndex()
+        index.add('wispile', fingerprint(igc), igc.pilot)
+        self.assertEqual([], index.query(fingerprint(gaggle), pilot=gaggle.pilot))
+        self.assertEqual(['wispile'], [key for key, _ in index.query(fingerprint(gaggle))])
+
+    def test_replace(self):
+        index = FingerprintIndex()
+        wispile = fingerprint(parse('../test/2015-07-09-Wispile.igc'))
+        fiesch = fingerprint(parse('../test/2015-08-07-Fiesch.igc'))
+        index.add('flight', wispile)
+        index.add('flight', fiesch)
+        self.assertEqual(1, len(index))
+        self.assertEqual(set(), index.candidates(wispile))
+        self.assertEqual([('flight', 1.0)], index.query(fiesch))
+
+    def test_empty(self):
+        igc = parse('../test/150509_Mimo Moratti_01.igc')
+        void = copy(igc, [record._replace(validity='V') for record in igc.b_records])
+        signature = fingerprint(void)
+        index = FingerprintIndex()
+        index.add('void', signature)
+        index.add('other void', signature)
+        self.assertEqual(0, len(index))
+        self.assertEqual([], index.query(signature))
+
+        index.add('flight', fingerprint(igc))
+        index.add('flight', signature)
+        self.assertEqual(0, len(index))
+        self.assertEqual([], index.query(fingerprint(igc)))
+
+    def test_persist(self):
+        index = FingerprintIndex()
+        signature = fingerprint(parse('../test/2015-07-09-Wispile.igc'))
+        index.add('wispile', signature, 'Michael Mimo Moratti')
+        index.save('fingerprint-index.json')
+        self.assertEqual([('wispile', 1.0)], FingerprintIndex.load('fingerprint-index.json').query(signature))
+
+if __name__ == '__main__':
+    unittest.main();
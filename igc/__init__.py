@@ -1,40 +1,146 @@
 from collections import namedtuple
+from collections.abc import Sequence
 from datetime import datetime
 from geo import distance, Wgs84Point
 import json
+import os
+import tarfile
+import zipfile
 
 BRecord = namedtuple('BRecord', ['datetime', 'point', 'validity', 'baro_altitude', 'gps_altitude'])
 
 
 def parse(file):
+    """
+    parses an igc file given as path or as binary or text stream (i.e. an archive member).
+    """
+    if isinstance(file, (str, bytes, os.PathLike)):
+        with open(file, 'rb') as igc:
+            return parse(igc)
     b_records = list()
+    date = None
     pilot = 'NKN'
     glider = 'NKN'
     instrument = 'NKN'
-    with open(file, 'r') as igc:
-        for line in igc:
-            if line.startswith('HFDTE'):
-                date = line[5:11]
-            elif line.startswith('HFPLTPILOT') or line.startswith('HPPLTPILOT'):
-                pilot = line[11:-1]
-            elif line.startswith('HFGTYGLIDERTYPE') or line.startswith('HPGTYGLIDERTYPE'):
-                glider = line[16:-1]
-            elif line.startswith('HFFTYFRTYPE'):
-                instrument = line[12:-1]
-            elif line.startswith('AXCT XCTrack'):
-                instrument = 'XCTrack'
-            elif line.startswith('B'):
-                b_records.append(__b_record(date, line))
+    for line in file:
+        line = __decode(line).rstrip('\r\n')
+        if line.startswith('HFDTE'):
+            date = line[5:11]
+        elif line.startswith('HFPLTPILOT') or line.startswith('HPPLTPILOT'):
+            pilot = line[11:]
+        elif line.startswith('HFGTYGLIDERTYPE') or line.startswith('HPGTYGLIDERTYPE'):
+            glider = line[16:]
+        elif line.startswith('HFFTYFRTYPE'):
+            instrument = line[12:]
+        elif line.startswith('AXCT XCTrack'):
+            instrument = 'XCTrack'
+        elif line.startswith('B'):
+            if date is None:
+                raise Exception('B record before HFDTE date header!')
+            b_records.append(__b_record(date, line))
+    if not b_records:
+        raise Exception('No B records found!')
     return Igc(b_records[0].datetime, pilot, glider, instrument, b_records)
 
 
-def analyze(igc):
+def parse_archive(file):
+    """
+    parses all igc members of a zip or tar archive given as path or binary stream in a single sequential pass
+    without extracting them. yields (member name, igc) tuples in archive order, igc is None for members
+    which can not be parsed so one broken file does not stop the batch.
+    non seekable streams (i.e. pipes) are read as tar, zip archives need a path or a seekable stream.
+    """
+    path = isinstance(file, (str, bytes, os.PathLike))
+    if path:
+        is_zip = zipfile.is_zipfile(file)
+    elif file.seekable():
+        position = file.tell()
+        is_zip = zipfile.is_zipfile(file)
+        file.seek(position)
+    else:
+        is_zip = False
+    if is_zip:
+        with zipfile.ZipFile(file) as archive:
+            for member in archive.infolist():
+                if not member.is_dir() and member.filename.lower().endswith('.igc'):
+                    with archive.open(member) as igc:
+                        yield member.filename, __parse_member(igc)
+    else:
+        archive = tarfile.open(file, mode='r|*') if path else tarfile.open(fileobj=file, mode='r|*')
+        with archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith('.igc'):
+                    yield member.name, __parse_member(archive.extractfile(member))
+
+
+def __parse_member(stream):
+    try:
+        return parse(stream)
+    except Exception:
+        return None
+
+
+def detect_flight(igc, takeoff_speed=4.0, takeoff_vario=1.5, takeoff_seconds=30,
+                  landing_speed=2.0, landing_vario=0.5, landing_seconds=60, max_speed=100.0):
+    """
+    detects takeoff and landing from ground speed (m/s) and vertical speed (m/s) between consecutive fixes.
+    the thresholds have to be exceeded for takeoff_seconds to count as takeoff and undercut for
+    landing_seconds to count as landing, the gap between both threshold pairs gives the hysteresis.
+    fixes faster than max_speed are gps glitches (i.e. the first fix after power on) and are skipped.
+    sets igc.takeoff and igc.landing to b_record indices or None if no flight was found.
+    Igc.flight_records runs the detection with the default thresholds if it was not run before.
+    """
+    records = igc.b_records
+    igc.detected = True
+    igc.takeoff = None
+    igc.landing = None
+    candidate = None
+    for index in range(1, len(records)):
+        previous_record = records[index - 1]
+        record = records[index]
+        seconds = (record.datetime - previous_record.datetime).total_seconds()
+        if seconds <= 0:
+            continue
+        speed = distance(previous_record.point, record.point) / seconds
+        if speed > max_speed:
+            continue
+        vario = abs(__altitude(record) - __altitude(previous_record)) / seconds
+        if igc.takeoff is None:
+            moving = speed > takeoff_speed or vario > takeoff_vario
+            required = takeoff_seconds
+        else:
+            moving = not (speed < landing_speed and vario < landing_vario)
+            required = landing_seconds
+        if moving == (igc.takeoff is None):
+            if candidate is None:
+                candidate = index - 1
+            if (record.datetime - records[candidate].datetime).total_seconds() >= required:
+                if igc.takeoff is None:
+                    igc.takeoff = candidate
+                else:
+                    igc.landing = candidate
+                    return
+                candidate = None
+        else:
+            candidate = None
+    if igc.takeoff is not None:
+        igc.landing = len(records) - 1
+
+
+def analyze(igc, terrain=None):
+    """
+    calculates the statistics of the airborne part of the track.
+    with a terrain (see terrain.Terrain) the gps altitude above ground is added as agl_altitude series,
+    void fixes and fixes without gps altitude have no agl altitude and are left out of min_agl_altitude.
+    """
+    records = igc.flight_records()
     igc.min_gps_altitude = 5000
     igc.max_gps_altitude = 0
     igc.min_baro_altitude = 5000
     igc.max_baro_altitude = 0
-    previous_record = igc.b_records[0]
-    for record in igc.b_records:
+    igc.tracklog_length = 0
+    previous_record = records[0]
+    for record in records:
         if previous_record and previous_record.validity == 'A' and record.validity == 'A':
             igc.tracklog_length += distance(previous_record.point, record.point)
         if igc.min_gps_altitude > record.gps_altitude:
@@ -47,7 +153,28 @@ def analyze(igc):
             igc.max_baro_altitude = record.baro_altitude
         previous_record = record
 
-    igc.flight_duration = igc.b_records[-1].datetime - igc.b_records[0].datetime
+    igc.flight_duration = records[-1].datetime - records[0].datetime
+
+    if terrain:
+        ground = terrain.elevations(record.point for record in records)
+        igc.agl_altitude = [record.gps_altitude - elevation
+                            if elevation is not None and record.validity == 'A' and record.gps_altitude else None
+                            for record, elevation in zip(records, ground)]
+        clearance = [altitude for altitude in igc.agl_altitude if altitude is not None]
+        igc.min_agl_altitude = min(clearance) if clearance else None
+
+
+def __decode(line):
+    if isinstance(line, str):
+        return line
+    try:
+        return line.decode('utf-8')
+    except UnicodeDecodeError:
+        return line.decode('latin-1')
+
+
+def __altitude(record):
+    return record.baro_altitude if record.baro_altitude else record.gps_altitude
 
 
 def __b_record(date, data):
@@ -83,6 +210,36 @@ def __longitude_deg(value, cardinal):
     return (degrees * -1, degrees)[cardinal == 'E']
 
 
+class RecordView(Sequence):
+    """
+    read only window onto a list of b records without copying it.
+    """
+
+    def __init__(self, records, start, stop):
+        self.records_ = records
+        self.start_ = start
+        self.stop_ = stop
+
+    def __len__(self):
+        return self.stop_ - self.start_
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return RecordView(self.records_, self.start_ + start, self.start_ + max(start, stop))
+            return [self.records_[self.start_ + n] for n in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('record index out of range')
+        return self.records_[self.start_ + index]
+
+    def __iter__(self):
+        for index in range(self.start_, self.stop_):
+            yield self.records_[index]
+
+
 class Igc:
 
     def __init__(self, date, pilot, glider, instrument, b_records):
@@ -97,10 +254,25 @@ class Igc:
         self.max_baro_altitude = 0
         self.flight_duration = 0
         self.tracklog_length = 0
+        self.agl_altitude = list()
+        self.min_agl_altitude = None
+        self.detected = False
+        self.takeoff = None
+        self.landing = None
+
+    def flight_records(self):
+        """
+        delivers the airborne b records from takeoff to landing, or all records if no flight was detected.
+        """
+        if not self.detected:
+            detect_flight(self)
+        if self.takeoff is None:
+            return RecordView(self.b_records, 0, len(self.b_records))
+        return RecordView(self.b_records, self.takeoff, self.landing + 1)
 
     def coordinates_as_json(self):
         coordinates = list()
-        for record in self.b_records:
+        for record in self.flight_records():
             latitude = float('{:.6f}'.format(record.point.latitude))
             longitude = float('{:.6f}'.format(record.point.longitude))
             coordinates.append({'lat': latitude, 'lng': longitude})
@@ -108,6 +280,6 @@ class Igc:
 
     def altitude_as_json(self):
         altitude = list()
-        for record in self.b_records:
+        for record in self.flight_records():
             altitude.append([record.datetime.strftime('%H:%M:%S'), record.gps_altitude])
         return json.dumps(altitude)
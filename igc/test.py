@@ -1,5 +1,14 @@
 import unittest
-from igc import parse
+from datetime import timedelta
+from igc import parse, parse_archive, analyze, detect_flight
+import io
+import json
+import os
+import tarfile
+import threading
+import zipfile
+
+FILES = ['2015-07-09-Wispile.igc', '2015-08-07-Fiesch.igc', '150509_Mimo Moratti_01.igc']
 
 
 class Parser(unittest.TestCase):
@@ -19,3 +28,112 @@ class Parser(unittest.TestCase):
         self.assertEqual('Michael Mimo Moratti', igc.pilot)
         self.assertEqual('XCTrack', igc.instrument)
         self.assertEqual('OZONE Delta 2', igc.glider)
+
+    def test_stream(self):
+        with open('../test/2015-07-09-Wispile.igc', 'rb') as file:
+            igc = parse(io.BytesIO(file.read()))
+        self.assertEqual('Michael Mimo Moratti', igc.pilot)
+        self.assertEqual(parse('../test/2015-07-09-Wispile.igc').b_records, igc.b_records)
+
+    def test_latin1_header(self):
+        with open('../test/150509_Mimo Moratti_01.igc', 'rb') as file:
+            data = file.read().replace(b'HFPLTPILOT:Mimo Moratti', 'HFPLTPILOT:Mimo Morätti'.encode('latin-1'))
+        self.assertTrue(parse(io.BytesIO(data)).pilot.startswith('Mimo Morätti'))
+
+
+class Archive(unittest.TestCase):
+
+    def assert_archive(self, archive):
+        archive.seek(0)
+        result = list(parse_archive(archive))
+        self.assertEqual(FILES, [name.split('/')[-1] for name, _ in result])
+        for file, (name, igc) in zip(FILES, result):
+            expected = parse('../test/{}'.format(file))
+            self.assertEqual(expected.pilot, igc.pilot)
+            self.assertEqual(expected.instrument, igc.instrument)
+            self.assertEqual(expected.b_records, igc.b_records)
+
+    def test_zip(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as output:
+            for file in FILES:
+                output.write('../test/{}'.format(file), 'day1/{}'.format(file))
+            output.writestr('day1/readme.txt', 'not a track')
+        self.assert_archive(archive)
+
+    def test_tar(self):
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode='w:gz') as output:
+            for file in FILES:
+                output.add('../test/{}'.format(file), file)
+        self.assert_archive(archive)
+
+    def test_pipe(self):
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode='w') as output:
+            for file in FILES:
+                output.add('../test/{}'.format(file), file)
+        read, write = os.pipe()
+
+        def feed():
+            with os.fdopen(write, 'wb') as pipe:
+                pipe.write(archive.getvalue())
+
+        writer = threading.Thread(target=feed)
+        writer.start()
+        with os.fdopen(read, 'rb') as pipe:
+            self.assertFalse(pipe.seekable())
+            result = list(parse_archive(pipe))
+        writer.join()
+        self.assertEqual(FILES, [name for name, _ in result])
+        for file, (_, igc) in zip(FILES, result):
+            self.assertEqual(parse('../test/{}'.format(file)).b_records, igc.b_records)
+
+    def test_broken_member(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as output:
+            output.write('../test/{}'.format(FILES[0]), FILES[0])
+            output.writestr('no-records.igc', 'HFDTE090715\r\nHFPLTPILOT:Nobody\r\n')
+            output.writestr('no-date.igc', 'B1056434626217N00717617EA018390193307\r\n')
+            output.write('../test/{}'.format(FILES[2]), FILES[2])
+        result = list(parse_archive(archive))
+        self.assertEqual([FILES[0], 'no-records.igc', 'no-date.igc', FILES[2]], [name for name, _ in result])
+        self.assertEqual([True, False, False, True], [igc is not None for _, igc in result])
+
+
+class FlightDetection(unittest.TestCase):
+
+    def test_detect_flight(self):
+        igc = parse('../test/150509_Mimo Moratti_01.igc')
+        detect_flight(igc)
+        self.assertEqual(8, igc.takeoff)
+        self.assertEqual(78, igc.landing)
+        records = igc.flight_records()
+        self.assertEqual(71, len(records))
+        self.assertEqual(igc.b_records[8], records[0])
+        self.assertEqual(igc.b_records[78], records[-1])
+        self.assertEqual(igc.b_records[10:20], list(records[2:12]))
+
+    def test_analyze_airborne(self):
+        igc = parse('../test/150509_Mimo Moratti_01.igc')
+        analyze(igc)
+        self.assertEqual(timedelta(minutes=5, seconds=55), igc.flight_duration)
+        self.assertAlmostEqual(3060, igc.tracklog_length, delta=1)
+
+    def test_lazy_detection(self):
+        igc = parse('../test/150509_Mimo Moratti_01.igc')
+        self.assertFalse(igc.detected)
+        coordinates = json.loads(igc.coordinates_as_json())
+        self.assertTrue(igc.detected)
+        self.assertEqual(8, igc.takeoff)
+        self.assertEqual(71, len(coordinates))
+        self.assertEqual(71, len(json.loads(igc.altitude_as_json())))
+
+    def test_no_flight(self):
+        igc = parse('../test/150509_Mimo Moratti_01.igc')
+        igc.b_records = igc.b_records[1:8]
+        detect_flight(igc)
+        self.assertIsNone(igc.takeoff)
+        self.assertIsNone(igc.landing)
+        self.assertEqual(7, len(igc.flight_records()))
+        self.assertTrue(igc.detected)
@@ -2,6 +2,8 @@ from collections import namedtuple
 from math import pi
 from geo import point as geo_point, bearing as geo_bearing
 from itertools import chain
+from xml.sax.saxutils import escape
+import os
 
 Polygon = namedtuple('Polygon', ['name', 'points'])
 Circle = namedtuple('Circle', ['name', 'description', 'center', 'radius'])
@@ -43,6 +45,9 @@ class Kml:
             self.folders_[folder] = list()
         self.folders_[folder].append(Line(name, points))
 
+    def add_track(self, folder, name, igc):
+        self.add_line(folder, name, [record.point for record in igc.flight_records()])
+
     def add_goal_line(self, folder, name, points):
         if folder not in self.folders_:
             self.folders_[folder] = list()
@@ -68,6 +73,95 @@ class Kml:
             file.write(line + '\n')
         file.close()
 
+    def build_replay(self, directory, igcs, overview_step=10, tile_size=500, min_lod_pixels=256):
+        """
+        writes an animated replay of many tracks as time stamped gx:Track elements, only the flight_records
+        of each track are exported (see igc.detect_flight).
+        doc.kml holds the folders of this kml plus one folder per pilot with a decimated overview track,
+        the full detail is split into tiles of tile_size fixes which google earth only loads through a
+        region bound network link once the tile covers min_lod_pixels on screen, the overview is only
+        drawn until the track covers min_lod_pixels so overview and detail swap instead of stacking.
+        igcs may be a generator, each track is written and released before the next one is consumed.
+        """
+        os.makedirs(os.path.join(directory, 'tiles'), exist_ok=True)
+        with open(os.path.join(directory, 'doc.kml'), 'w', encoding='utf-8') as file:
+            kml = self.__header()
+            for name, folder in self.folders_.items():
+                kml = chain(kml, self.__folder(name, folder))
+            for line in kml:
+                file.write(line + '\n')
+            for index, igc in enumerate(igcs):
+                for line in self.__replay_folder(directory, index, igc, overview_step, tile_size, min_lod_pixels):
+                    file.write(line + '\n')
+            for line in self.__footer():
+                file.write(line + '\n')
+
+    def __replay_folder(self, directory, index, igc, overview_step, tile_size, min_lod_pixels):
+        records = igc.flight_records()
+        pilot = escape(igc.pilot)
+        yield '<Folder>'
+        yield '<name>{}</name>'.format(pilot)
+        yield from self.__gx_track('{} overview'.format(pilot), records[::overview_step],
+                                   self.__region(records, 0, min_lod_pixels))
+        for tile, start in enumerate(range(0, max(len(records) - 1, 1), tile_size)):
+            chunk = records[start:start + tile_size + 1]
+            href = 'tiles/{}-{}.kml'.format(index, tile)
+            with open(os.path.join(directory, href), 'w', encoding='utf-8') as file:
+                for line in chain(self.__tile_header(pilot), self.__gx_track(pilot, chunk), self.__footer()):
+                    file.write(line + '\n')
+            yield '<NetworkLink>'
+            yield '<name>{} {}</name>'.format(pilot, tile)
+            yield from self.__region(chunk, min_lod_pixels, -1)
+            yield '<Link>'
+            yield '<href>{}</href>'.format(href)
+            yield '<viewRefreshMode>onRegion</viewRefreshMode>'
+            yield '</Link>'
+            yield '</NetworkLink>'
+        yield '</Folder>'
+
+    def __gx_track(self, name, records, region=()):
+        yield '<Placemark>'
+        yield '<name>{}</name>'.format(name)
+        yield '<styleUrl>#track</styleUrl>'
+        yield from region
+        yield '<gx:Track>'
+        yield '<altitudeMode>absolute</altitudeMode>'
+        for record in records:
+            yield '<when>{}</when>'.format(record.datetime.strftime('%Y-%m-%dT%H:%M:%SZ'))
+        for record in records:
+            yield '<gx:coord>{} {} {}</gx:coord>'.format(record.point.longitude, record.point.latitude,
+                                                         record.gps_altitude)
+        yield '</gx:Track>'
+        yield '</Placemark>'
+
+    def __region(self, records, min_lod_pixels, max_lod_pixels):
+        latitudes = [record.point.latitude for record in records]
+        longitudes = [record.point.longitude for record in records]
+        yield '<Region>'
+        yield '<LatLonAltBox>'
+        yield '<north>{}</north>'.format(max(latitudes))
+        yield '<south>{}</south>'.format(min(latitudes))
+        yield '<east>{}</east>'.format(max(longitudes))
+        yield '<west>{}</west>'.format(min(longitudes))
+        yield '</LatLonAltBox>'
+        yield '<Lod>'
+        yield '<minLodPixels>{}</minLodPixels>'.format(min_lod_pixels)
+        yield '<maxLodPixels>{}</maxLodPixels>'.format(max_lod_pixels)
+        yield '</Lod>'
+        yield '</Region>'
+
+    def __tile_header(self, name):
+        yield '<?xml version="1.0" encoding="UTF-8"?>'
+        yield '<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:gx="http://www.google.com/kml/ext/2.2">'
+        yield '<Document>'
+        yield '<name>{}</name>'.format(name)
+        yield '<Style id="track">'
+        yield '<LineStyle>'
+        yield '<color>ff00aaff</color>'
+        yield '<width>2</width>'
+        yield '</LineStyle>'
+        yield '</Style>'
+
     def __folder(self, name, folder):
         yield '<Folder>'
         yield '<name>{}</name>'.format(name)
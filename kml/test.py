@@ -1,6 +1,7 @@
 import unittest
+from xml.etree import ElementTree
 from kml import Kml
-from igc import Wgs84Point
+from igc import Wgs84Point, parse, detect_flight
 
 
 class KmlTest(unittest.TestCase):
@@ -21,3 +22,54 @@ class KmlTest(unittest.TestCase):
 
         kml.add_line('Test', 'Track', points)
         kml.build('line-test.kml')
+
+    def test_track(self):
+        igc = parse('../test/150509_Mimo Moratti_01.igc')
+        detect_flight(igc)
+        kml = Kml('TrackTest', 2000)
+        kml.add_track('Test', igc.pilot, igc)
+        self.assertEqual(71, len(kml.folders_['Test'][0].points))
+        kml.build('track-test.kml')
+
+    def test_replay(self):
+        kml = Kml('ReplayTest', 2000)
+        kml.add_circle('Task', 'Wispile', 'takeoff', Wgs84Point(46.437, 7.294), 400)
+        files = ['../test/2015-07-09-Wispile.igc', '../test/150709_Mimo Moratti_01.igc']
+        kml.build_replay('replay-test', (parse(file) for file in files), tile_size=1000)
+
+        namespaces = {'kml': 'http://www.opengis.net/kml/2.2', 'gx': 'http://www.google.com/kml/ext/2.2'}
+        document = ElementTree.parse('replay-test/doc.kml').getroot()
+        self.assertEqual(3, len(document.findall('kml:Document/kml:Folder', namespaces)))
+        self.assertEqual(2, len(document.findall('.//gx:Track', namespaces)))
+        pilots = document.findall('kml:Document/kml:Folder', namespaces)[1:]
+        self.assertEqual([4, 1], [len(pilot.findall('kml:NetworkLink', namespaces)) for pilot in pilots])
+        for pilot in pilots:
+            overview = pilot.find('kml:Placemark/kml:Region/kml:Lod', namespaces)
+            self.assertEqual('0', overview.find('kml:minLodPixels', namespaces).text)
+            self.assertEqual('256', overview.find('kml:maxLodPixels', namespaces).text)
+            for link in pilot.findall('kml:NetworkLink', namespaces):
+                self.assertIsNotNone(link.find('kml:Region/kml:LatLonAltBox/kml:north', namespaces))
+                lod = link.find('kml:Region/kml:Lod', namespaces)
+                self.assertEqual('256', lod.find('kml:minLodPixels', namespaces).text)
+                self.assertEqual('-1', lod.find('kml:maxLodPixels', namespaces).text)
+
+        tile = ElementTree.parse('replay-test/tiles/0-0.kml').getroot()
+        track = tile.find('.//gx:Track', namespaces)
+        self.assertEqual(1001, len(track.findall('kml:when', namespaces)))
+        self.assertEqual(1001, len(track.findall('gx:coord', namespaces)))
+        self.assertEqual('2015-07-09T10:57:43Z', track.find('kml:when', namespaces).text)
+
+    def test_replay_pilot_name(self):
+        igc = parse('../test/150509_Mimo Moratti_01.igc')
+        igc.pilot = 'Mimo & <Morätti>'
+        Kml('ReplayNameTest', 2000).build_replay('replay-name-test', [igc])
+
+        namespaces = {'kml': 'http://www.opengis.net/kml/2.2', 'gx': 'http://www.google.com/kml/ext/2.2'}
+        document = ElementTree.parse('replay-name-test/doc.kml').getroot()
+        folder = document.find('kml:Document/kml:Folder', namespaces)
+        self.assertEqual('Mimo & <Morätti>', folder.find('kml:name', namespaces).text)
+        children = [child.tag.split('}')[-1] for child in folder.find('kml:Placemark', namespaces)]
+        self.assertEqual(['name', 'styleUrl', 'Region', 'Track'], children)
+        tile = ElementTree.parse('replay-name-test/tiles/0-0.kml').getroot()
+        self.assertEqual('Mimo & <Morätti>', tile.find('kml:Document/kml:name', namespaces).text)
+
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from math import floor, sqrt
+import mmap
+import os
+import struct
+
+VOID = -32768
+
+
+def tile_name(latitude, longitude):
+    """
+    delivers the srtm tile name covering the point, i.e. N46E007.hgt.
+    """
+    south = int(floor(latitude))
+    west = int(floor(longitude))
+    return '{}{:02d}{}{:03d}.hgt'.format(('S', 'N')[south >= 0], abs(south), ('W', 'E')[west >= 0], abs(west))
+
+
+class Tile:
+    """
+    memory mapped srtm .hgt tile, a square grid of big endian int16 samples from north west to south east.
+    """
+
+    def __init__(self, path, south, west):
+        self.south = south
+        self.west = west
+        self.file_ = open(path, 'rb')
+        self.data_ = mmap.mmap(self.file_.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = int(sqrt(len(self.data_) // 2))
+        if self.size * self.size * 2 != len(self.data_):
+            self.close()
+            raise Exception('{} is not a square hgt tile!'.format(path))
+
+    def sample(self, row, column):
+        return struct.unpack_from('>h', self.data_, (row * self.size + column) * 2)[0]
+
+    def elevation(self, latitude, longitude):
+        """
+        bilinear interpolation of the four samples surrounding the point, None if one of them is void.
+        """
+        cells = self.size - 1
+        row = (self.south + 1 - latitude) * cells
+        column = (longitude - self.west) * cells
+        top = min(int(row), cells - 1)
+        left = min(int(column), cells - 1)
+        dy = row - top
+        dx = column - left
+        samples = (self.sample(top, left), self.sample(top, left + 1),
+                   self.sample(top + 1, left), self.sample(top + 1, left + 1))
+        if VOID in samples:
+            return None
+        north = samples[0] + (samples[1] - samples[0]) * dx
+        south = samples[2] + (samples[3] - samples[2]) * dx
+        return north + (south - north) * dy
+
+    def close(self):
+        self.data_.close()
+        self.file_.close()
+
+
+class Terrain:
+    """
+    ground elevation lookup over a directory of .hgt tiles keeping at most max_tiles of them open.
+    """
+
+    def __init__(self, directory, max_tiles=16):
+        self.directory = directory
+        self.max_tiles = max_tiles
+        self.tiles_ = OrderedDict()
+
+    def elevation(self, point):
+        tile = self.__tile(int(floor(point.latitude)), int(floor(point.longitude)))
+        return tile.elevation(point.latitude, point.longitude) if tile else None
+
+    def elevations(self, points):
+        """
+        delivers the ground elevation of every point, None where no tile exists or the data is void.
+        consecutive points on the same tile skip the tile lookup.
+        """
+        result = list()
+        key = None
+        tile = None
+        for point in points:
+            south = int(floor(point.latitude))
+            west = int(floor(point.longitude))
+            if (south, west) != key:
+                key = (south, west)
+                tile = self.__tile(south, west)
+            result.append(tile.elevation(point.latitude, point.longitude) if tile else None)
+        return result
+
+    def close(self):
+        for tile in self.tiles_.values():
+            if tile:
+                tile.close()
+        self.tiles_.clear()
+
+    def __tile(self, south, west):
+        key = (south, west)
+        if key in self.tiles_:
+            self.tiles_.move_to_end(key)
+            return self.tiles_[key]
+        path = os.path.join(self.directory, tile_name(south, west))
+        tile = Tile(path, south, west) if os.path.exists(path) else None
+        self.tiles_[key] = tile
+        if len(self.tiles_) > self.max_tiles:
+            _, evicted = self.tiles_.popitem(last=False)
+            if evicted:
+                evicted.close()
+        return tile
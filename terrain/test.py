@@ -0,0 +1,83 @@
+import unittest
+import os
+import struct
+from geo import Wgs84Point
+from datetime import datetime, timedelta
+from igc import parse, analyze, Igc, BRecord
+from terrain import Terrain, tile_name, VOID
+
+
+def write_tile(directory, south, west, size, elevation):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, tile_name(south, west)), 'wb') as file:
+        for row in range(size):
+            for column in range(size):
+                file.write(struct.pack('>h', elevation(row, column)))
+
+
+class TerrainTest(unittest.TestCase):
+
+    def setUp(self):
+        # rises 100m per row towards the south and 10m per column towards the east
+        write_tile('terrain-test', 46, 7, 11, lambda row, column: 1000 + row * 100 + column * 10)
+        write_tile('terrain-test', 46, 8, 11, lambda row, column: VOID if row == 5 and column == 5 else 500)
+        self.terrain = Terrain('terrain-test', max_tiles=1)
+
+    def tearDown(self):
+        self.terrain.close()
+
+    def test_tile_name(self):
+        self.assertEqual('N46E007.hgt', tile_name(46.5, 7.2))
+        self.assertEqual('S01W001.hgt', tile_name(-0.5, -0.2))
+
+    def test_corners(self):
+        self.assertAlmostEqual(1000, self.terrain.elevation(Wgs84Point(46.9999999, 7.0)), places=3)
+        self.assertAlmostEqual(2100, self.terrain.elevation(Wgs84Point(46.0, 7.9999999)), places=3)
+
+    def test_bilinear(self):
+        self.assertAlmostEqual(1000 + 2.5 * 100 + 4.5 * 10, self.terrain.elevation(Wgs84Point(46.75, 7.45)))
+
+    def test_void_and_missing(self):
+        self.assertIsNone(self.terrain.elevation(Wgs84Point(46.48, 8.52)))
+        self.assertAlmostEqual(500, self.terrain.elevation(Wgs84Point(46.2, 8.2)))
+        self.assertIsNone(self.terrain.elevation(Wgs84Point(45.5, 7.5)))
+
+    def test_elevations(self):
+        points = [Wgs84Point(46.75, 7.45), Wgs84Point(46.2, 8.2), Wgs84Point(46.75, 7.45)]
+        self.assertEqual([1295, 500, 1295], [round(value) for value in self.terrain.elevations(points)])
+
+    def test_analyze(self):
+        igc = parse('../test/2015-07-09-Wispile.igc')
+        analyze(igc, self.terrain)
+        records = igc.flight_records()
+        self.assertEqual(len(records), len(igc.agl_altitude))
+        ground = self.terrain.elevation(records[0].point)
+        self.assertAlmostEqual(records[0].gps_altitude - ground, igc.agl_altitude[0])
+        self.assertEqual(min(igc.agl_altitude), igc.min_agl_altitude)
+
+
+class VoidFixTest(unittest.TestCase):
+
+    def setUp(self):
+        write_tile('terrain-test-flat', 46, 7, 11, lambda row, column: 400)
+        self.terrain = Terrain('terrain-test-flat')
+
+    def tearDown(self):
+        self.terrain.close()
+
+    def test_void_fix(self):
+        start = datetime(2015, 7, 9, 11, 0, 0)
+        point = Wgs84Point(46.5, 7.5)
+        records = [BRecord(start + timedelta(seconds=second), point, 'A', 0, 1000 - second) for second in range(10)]
+        records[4] = records[4]._replace(validity='V', gps_altitude=0)
+        records[6] = records[6]._replace(validity='V')
+        records[8] = records[8]._replace(gps_altitude=0)
+        igc = Igc(start, 'Test', 'Test', 'Test', records)
+        analyze(igc, self.terrain)
+        self.assertIsNone(igc.agl_altitude[4])
+        self.assertIsNone(igc.agl_altitude[6])
+        self.assertIsNone(igc.agl_altitude[8])
+        self.assertAlmostEqual(591, igc.min_agl_altitude)
+
+if __name__ == '__main__':
+    unittest.main();
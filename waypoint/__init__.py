@@ -0,0 +1,243 @@
+from collections import namedtuple
+from math import sin, cos, asin, radians, sqrt, pi
+from heapq import heappush, heappushpop
+from xml.etree import ElementTree
+from geo import Wgs84Point
+from __fai import distance, bearing_between_two_points, EARTH_RADIUS_IN_METERS
+import csv
+import json
+
+Waypoint = namedtuple('Waypoint', ['name', 'description', 'point', 'altitude'])
+Node = namedtuple('Node', ['index', 'axis', 'left', 'right'])
+
+FEET_IN_METERS = 0.3048
+
+
+def load(file):
+    """
+    loads waypoints from a SeeYou (.cup) or GPX (.gpx) file.
+    """
+    if file.lower().endswith('.cup'):
+        return parse_cup(file)
+    elif file.lower().endswith('.gpx'):
+        return parse_gpx(file)
+    raise Exception('Unsupported waypoint file format: {}'.format(file))
+
+
+def parse_cup(file):
+    """
+    waypoints are named by their code, falling back to the full name for codes already used in the file.
+    """
+    waypoints = list()
+    codes = set()
+    with open(file, 'r', encoding='utf-8', errors='replace') as cup:
+        reader = csv.reader(cup)
+        for row in reader:
+            if not row or row[0].lower() == 'name':
+                continue
+            if row[0].startswith('-----Related Tasks'):
+                break
+            name = row[1] if row[1] and row[1] not in codes else row[0]
+            codes.add(name)
+            waypoints.append(Waypoint(
+                name,
+                row[0],
+                Wgs84Point(__cup_coordinate(row[3], 2), __cup_coordinate(row[4], 3)),
+                __cup_altitude(row[5])
+            ))
+    return waypoints
+
+
+def parse_gpx(file):
+    waypoints = list()
+    for element in ElementTree.parse(file).getroot().iter():
+        if not element.tag.endswith('wpt'):
+            continue
+        fields = dict((child.tag.split('}')[-1], child.text) for child in element)
+        waypoints.append(Waypoint(
+            fields.get('name', ''),
+            fields.get('desc', '') or '',
+            Wgs84Point(float(element.get('lat')), float(element.get('lon'))),
+            float(fields.get('ele', 0) or 0)
+        ))
+    return waypoints
+
+
+def __cup_coordinate(value, degree_digits):
+    degrees = float(value[0:degree_digits]) + float(value[degree_digits:-1]) / 60
+    return (degrees * -1, degrees)[value[-1] in ('N', 'E')]
+
+
+def __cup_altitude(value):
+    if value.endswith('ft'):
+        return float(value[:-2]) * FEET_IN_METERS
+    if value.endswith('m'):
+        return float(value[:-1])
+    return float(value or 0)
+
+
+def unit_vector(point):
+    """
+    converts a lat/lon point into a 3d vector on the unit sphere.
+    """
+    latitude = radians(point.latitude)
+    longitude = radians(point.longitude)
+    return cos(latitude) * cos(longitude), cos(latitude) * sin(longitude), sin(latitude)
+
+
+def chord_to_distance(chord):
+    """
+    converts the straight line distance between two unit vectors into the great circle distance in meters.
+    """
+    return 2 * EARTH_RADIUS_IN_METERS * asin(min(1.0, chord / 2))
+
+
+def distance_to_chord(meters):
+    return 2 * sin(min(meters / EARTH_RADIUS_IN_METERS, pi) / 2)
+
+
+class WaypointDatabase:
+
+    def __init__(self, waypoints):
+        self.waypoints = list(waypoints)
+        self.vectors_ = [unit_vector(waypoint.point) for waypoint in self.waypoints]
+        self.indices_ = dict()
+        for index, waypoint in enumerate(self.waypoints):
+            if waypoint.name in self.indices_:
+                raise Exception('Duplicate waypoint name: {}'.format(waypoint.name))
+            self.indices_[waypoint.name] = index
+        self.tree_ = self.__build(list(range(len(self.waypoints))), 0)
+        self.distances_ = None
+        self.bearings_ = None
+
+    def __len__(self):
+        return len(self.waypoints)
+
+    def __getitem__(self, name):
+        return self.waypoints[self.indices_[name]]
+
+    def nearest(self, point, k=1):
+        """
+        delivers the k nearest waypoints to the point as a list of (waypoint, distance) sorted by distance.
+        """
+        if k <= 0:
+            return list()
+        vector = unit_vector(point)
+        heap = list()
+        self.__nearest(self.tree_, vector, k, heap)
+        return [(self.waypoints[index], chord_to_distance(sqrt(-squared)))
+                for squared, index in sorted(heap, reverse=True)]
+
+    def within(self, point, radius):
+        """
+        delivers all waypoints within radius meters of the point as a list of (waypoint, distance).
+        """
+        vector = unit_vector(point)
+        chord = distance_to_chord(radius)
+        found = list()
+        self.__within(self.tree_, vector, chord * chord, found)
+        return sorted([(self.waypoints[index], chord_to_distance(sqrt(squared))) for squared, index in found],
+                      key=lambda entry: entry[1])
+
+    def passed(self, points, radius):
+        """
+        delivers the waypoints a track passes within radius meters of, in the order they were first reached.
+        """
+        passed = list()
+        seen = set()
+        for point in points:
+            for waypoint, _ in self.within(point, radius):
+                if waypoint.name not in seen:
+                    seen.add(waypoint.name)
+                    passed.append(waypoint)
+        return passed
+
+    def build_matrix(self):
+        """
+        precomputes the pairwise distance and bearing between all waypoints.
+        """
+        count = len(self.waypoints)
+        self.distances_ = [[0.0] * count for _ in range(count)]
+        self.bearings_ = [[0.0] * count for _ in range(count)]
+        for i, start in enumerate(self.waypoints):
+            for j in range(i + 1, count):
+                end = self.waypoints[j]
+                meters = distance(start.point, end.point)
+                self.distances_[i][j] = meters
+                self.distances_[j][i] = meters
+                self.bearings_[i][j] = bearing_between_two_points(start.point, end.point)
+                self.bearings_[j][i] = bearing_between_two_points(end.point, start.point)
+
+    def save_matrix(self, file):
+        if self.distances_ is None:
+            self.build_matrix()
+        with open(file, 'w') as output:
+            json.dump({
+                'names': [waypoint.name for waypoint in self.waypoints],
+                'distances': self.distances_,
+                'bearings': self.bearings_
+            }, output)
+
+    def load_matrix(self, file):
+        with open(file, 'r') as data:
+            matrix = json.load(data)
+        if matrix['names'] != [waypoint.name for waypoint in self.waypoints]:
+            raise Exception('Matrix in {} does not match the loaded waypoints!'.format(file))
+        self.distances_ = matrix['distances']
+        self.bearings_ = matrix['bearings']
+
+    def distance(self, start, end):
+        if self.distances_ is None:
+            self.build_matrix()
+        return self.distances_[self.indices_[start]][self.indices_[end]]
+
+    def bearing(self, start, end):
+        if self.bearings_ is None:
+            self.build_matrix()
+        return self.bearings_[self.indices_[start]][self.indices_[end]]
+
+    def task_distance(self, names):
+        """
+        sums the center to center distance of a task given as a list of waypoint names.
+        """
+        return sum(self.distance(start, end) for start, end in zip(names, names[1:]))
+
+    def __build(self, indices, depth):
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda index: self.vectors_[index][axis])
+        median = len(indices) // 2
+        return Node(indices[median], axis,
+                    self.__build(indices[:median], depth + 1),
+                    self.__build(indices[median + 1:], depth + 1))
+
+    def __squared(self, vector, index):
+        other = self.vectors_[index]
+        return (vector[0] - other[0]) ** 2 + (vector[1] - other[1]) ** 2 + (vector[2] - other[2]) ** 2
+
+    def __nearest(self, node, vector, k, heap):
+        if node is None:
+            return
+        entry = (-self.__squared(vector, node.index), node.index)
+        if len(heap) < k:
+            heappush(heap, entry)
+        elif entry > heap[0]:
+            heappushpop(heap, entry)
+        delta = vector[node.axis] - self.vectors_[node.index][node.axis]
+        near, far = (node.right, node.left) if delta > 0 else (node.left, node.right)
+        self.__nearest(near, vector, k, heap)
+        if len(heap) < k or delta * delta < -heap[0][0]:
+            self.__nearest(far, vector, k, heap)
+
+    def __within(self, node, vector, limit, found):
+        if node is None:
+            return
+        squared = self.__squared(vector, node.index)
+        if squared <= limit:
+            found.append((squared, node.index))
+        delta = vector[node.axis] - self.vectors_[node.index][node.axis]
+        if delta <= 0 or delta * delta <= limit:
+            self.__within(node.left, vector, limit, found)
+        if delta >= 0 or delta * delta <= limit:
+            self.__within(node.right, vector, limit, found)
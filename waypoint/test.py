@@ -0,0 +1,77 @@
+import unittest
+from geo import Wgs84Point
+from __fai import distance, bearing_between_two_points
+from waypoint import load, WaypointDatabase
+
+
+class Loader(unittest.TestCase):
+
+    def test_cup(self):
+        waypoints = load('../test/waypoints.cup')
+        self.assertEqual(9, len(waypoints))
+        self.assertEqual('PILATU', waypoints[0].name)
+        self.assertEqual('Pilatus', waypoints[0].description)
+        self.assertAlmostEqual(46.978300, waypoints[0].point.latitude, places=5)
+        self.assertAlmostEqual(8.254783, waypoints[0].point.longitude, places=5)
+        self.assertAlmostEqual(1786.13, waypoints[6].altitude, places=2)
+
+    def test_cup_duplicate_code(self):
+        with open('duplicate-test.cup', 'w') as file:
+            file.write('name,code,country,lat,lon,elev,style\n')
+            file.write('"Pilatus","PILATU",CH,4658.698N,00815.287E,2119.0m,1\n')
+            file.write('"Pilatus Kulm","PILATU",CH,4658.500N,00815.100E,2100.0m,1\n')
+        waypoints = load('duplicate-test.cup')
+        self.assertEqual(['PILATU', 'Pilatus Kulm'], [waypoint.name for waypoint in waypoints])
+        self.assertEqual('Pilatus Kulm', WaypointDatabase(waypoints)['Pilatus Kulm'].description)
+
+    def test_duplicate_name(self):
+        waypoint = load('../test/waypoints.cup')[0]
+        self.assertRaises(Exception, WaypointDatabase, [waypoint, waypoint])
+
+
+class Database(unittest.TestCase):
+
+    def setUp(self):
+        self.database = WaypointDatabase(load('../test/waypoints.cup'))
+
+    def test_nearest(self):
+        point = Wgs84Point(46.928876, 8.339587)
+        result = self.database.nearest(point, 3)
+        expected = sorted(self.database.waypoints, key=lambda waypoint: distance(point, waypoint.point))[:3]
+        self.assertEqual([waypoint.name for waypoint in expected], [waypoint.name for waypoint, _ in result])
+        for waypoint, meters in result:
+            self.assertAlmostEqual(distance(point, waypoint.point), meters, delta=0.01)
+
+    def test_nearest_none(self):
+        self.assertEqual([], self.database.nearest(Wgs84Point(46.9, 8.3), 0))
+
+    def test_within(self):
+        point = Wgs84Point(46.978308, 8.254787)
+        result = self.database.within(point, 12000)
+        expected = [waypoint.name for waypoint in self.database.waypoints if distance(point, waypoint.point) <= 12000]
+        self.assertEqual(sorted(expected), sorted(waypoint.name for waypoint, _ in result))
+        self.assertEqual('PILATU', result[0][0].name)
+
+    def test_passed(self):
+        track = [Wgs84Point(46.978, 8.254), Wgs84Point(46.95, 8.30), Wgs84Point(46.929, 8.340)]
+        result = self.database.passed(track, 500)
+        self.assertEqual(['PILATU', 'STANSE'], [waypoint.name for waypoint in result])
+
+    def test_matrix(self):
+        pilatus = self.database['PILATU']
+        stanserhorn = self.database['STANSE']
+        self.assertAlmostEqual(distance(pilatus.point, stanserhorn.point),
+                               self.database.distance('PILATU', 'STANSE'), places=6)
+        self.assertAlmostEqual(bearing_between_two_points(stanserhorn.point, pilatus.point),
+                               self.database.bearing('STANSE', 'PILATU'), places=6)
+        self.assertAlmostEqual(self.database.distance('PILATU', 'STANSE') + self.database.distance('STANSE', 'BUOCHS'),
+                               self.database.task_distance(['PILATU', 'STANSE', 'BUOCHS']), places=6)
+
+    def test_persist_matrix(self):
+        self.database.save_matrix('waypoint-matrix.json')
+        database = WaypointDatabase(self.database.waypoints)
+        database.load_matrix('waypoint-matrix.json')
+        self.assertEqual(self.database.distance('MEGGEN', 'FIESCH'), database.distance('MEGGEN', 'FIESCH'))
+
+if __name__ == '__main__':
+    unittest.main();
@@ -0,0 +1,135 @@
+from collections import namedtuple, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from math import sin, cos, atan2, sqrt, pi
+from __fai import distance, bearing_between_two_points
+from igc import parse
+
+Circle = namedtuple('Circle', ['start', 'end', 'altitude', 'wind_east', 'wind_north', 'airspeed'])
+Wind = namedtuple('Wind', ['altitude', 'speed', 'direction', 'circles'])
+
+
+def circles(igc, min_turn_rate=0.07, min_speed=2.0, min_samples=6, min_airspeed=3.0, max_airspeed=25.0):
+    """
+    finds full circles in the airborne part of the track and estimates the wind of each one.
+    a circle is a run of heading changes in one direction faster than min_turn_rate (rad/s) adding up to 2pi.
+    the ground velocities of a circle lie on a circle centered at the wind vector with the airspeed as radius,
+    which is fitted with linear least squares. returns a list of Circle with the wind in m/s.
+    """
+    records = igc.flight_records()
+    result = list()
+    velocities = list()
+    altitudes = list()
+    start = None
+    turn = 0
+    previous_bearing = None
+    for index in range(1, len(records)):
+        previous_record = records[index - 1]
+        record = records[index]
+        seconds = (record.datetime - previous_record.datetime).total_seconds()
+        speed = distance(previous_record.point, record.point) / seconds if seconds > 0 else 0
+        if speed < min_speed:
+            previous_bearing = None
+            start = None
+            continue
+        bearing = bearing_between_two_points(previous_record.point, record.point)
+        velocity = (speed * sin(bearing), speed * cos(bearing))
+        if previous_bearing is None:
+            previous_bearing = bearing
+            start = None
+            continue
+        delta = __wrap(bearing - previous_bearing)
+        previous_bearing = bearing
+        if abs(delta) / seconds < min_turn_rate or (start is not None and delta * turn < 0):
+            start = None
+            continue
+        if start is None:
+            start = index - 1
+            turn = 0
+            velocities = list()
+            altitudes = list()
+        turn += delta
+        velocities.append(velocity)
+        altitudes.append(record.gps_altitude)
+        if abs(turn) >= 2 * pi:
+            fit = fit_circle(velocities) if len(velocities) >= min_samples else None
+            if fit and min_airspeed <= fit[2] <= max_airspeed:
+                result.append(Circle(records[start].datetime, record.datetime, sum(altitudes) / len(altitudes), *fit))
+            start = index
+            turn = 0
+            velocities = list()
+            altitudes = list()
+    return result
+
+
+def fit_circle(points):
+    """
+    algebraic least squares circle fit (kasa), solves x^2 + y^2 = 2ax + 2by + c.
+    returns (center x, center y, radius) or None if the points are degenerated.
+    """
+    sxx = sxy = syy = sx = sy = sxz = syz = sz = 0.0
+    for x, y in points:
+        z = x * x + y * y
+        sxx += x * x
+        sxy += x * y
+        syy += y * y
+        sx += x
+        sy += y
+        sxz += x * z
+        syz += y * z
+        sz += z
+    n = len(points)
+    matrix = ((2 * sxx, 2 * sxy, sx), (2 * sxy, 2 * syy, sy), (2 * sx, 2 * sy, n))
+    determinant = __determinant(matrix)
+    if abs(determinant) < 1e-9:
+        return None
+    vector = (sxz, syz, sz)
+    solution = list()
+    for column in range(3):
+        replaced = tuple(tuple(vector[row] if c == column else matrix[row][c] for c in range(3)) for row in range(3))
+        solution.append(__determinant(replaced) / determinant)
+    a, b, c = solution
+    squared = c + a * a + b * b
+    if squared <= 0:
+        return None
+    return a, b, sqrt(squared)
+
+
+def wind_profile(estimates, band=250):
+    """
+    averages circle wind vectors per altitude band (m). direction is where the wind comes from in radians.
+    """
+    bands = defaultdict(list)
+    for circle in estimates:
+        bands[int(circle.altitude // band) * band].append(circle)
+    profile = list()
+    for altitude in sorted(bands):
+        entries = bands[altitude]
+        east = sum(circle.wind_east for circle in entries) / len(entries)
+        north = sum(circle.wind_north for circle in entries) / len(entries)
+        direction = atan2(-east, -north)
+        profile.append(Wind(altitude, sqrt(east * east + north * north),
+                            direction if direction >= 0 else (2 * pi) + direction, len(entries)))
+    return profile
+
+
+def day_profile(files, band=250, processes=None):
+    """
+    parses and estimates the circles of a day's flights in parallel and aggregates them to one wind profile.
+    """
+    with ProcessPoolExecutor(processes) as executor:
+        estimates = [circle for flight in executor.map(__file_circles, files) for circle in flight]
+    return wind_profile(estimates, band)
+
+
+def __file_circles(file):
+    return circles(parse(file))
+
+
+def __wrap(angle):
+    return (angle + pi) % (2 * pi) - pi
+
+
+def __determinant(m):
+    return m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1]) - \
+           m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0]) + \
+           m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0])
@@ -0,0 +1,68 @@
+import unittest
+from datetime import datetime, timedelta
+from math import sin, cos, atan2, sqrt, pi
+from geo import Wgs84Point
+from __fai import point_from_distance_and_bearing
+from igc import Igc, BRecord
+from wind import circles, fit_circle, wind_profile, day_profile
+
+
+def thermal(wind_east, wind_north, airspeed=10.0, period=20, seconds=600, climb=2.0):
+    """
+    synthetic track circling with a constant airspeed and turn rate while drifting with the wind.
+    """
+    start = datetime(2015, 7, 9, 11, 0, 0)
+    point = Wgs84Point(46.4, 7.3)
+    records = list()
+    for second in range(seconds):
+        records.append(BRecord(start + timedelta(seconds=second), point, 'A', 0, int(1000 + second * climb)))
+        heading = (2 * pi * second) / period
+        east = airspeed * sin(heading) + wind_east
+        north = airspeed * cos(heading) + wind_north
+        point = point_from_distance_and_bearing(point, sqrt(east * east + north * north), atan2(east, north))
+    return Igc(start, 'Test', 'Test', 'Test', records)
+
+
+class FitCircle(unittest.TestCase):
+
+    def test_fit(self):
+        points = [(3 + 2 * cos(phi / 10), -1 + 2 * sin(phi / 10)) for phi in range(0, 63, 5)]
+        x, y, radius = fit_circle(points)
+        self.assertAlmostEqual(3, x, places=6)
+        self.assertAlmostEqual(-1, y, places=6)
+        self.assertAlmostEqual(2, radius, places=6)
+
+    def test_degenerated(self):
+        self.assertIsNone(fit_circle([(1, 1), (2, 2), (3, 3)]))
+
+
+class Wind(unittest.TestCase):
+
+    def test_circles(self):
+        result = circles(thermal(5, 0))
+        self.assertGreater(len(result), 20)
+        for circle in result:
+            self.assertAlmostEqual(5, circle.wind_east, delta=0.3)
+            self.assertAlmostEqual(0, circle.wind_north, delta=0.3)
+            self.assertAlmostEqual(10, circle.airspeed, delta=0.3)
+
+    def test_profile(self):
+        profile = wind_profile(circles(thermal(-3, -3)), band=500)
+        self.assertEqual([1000, 1500, 2000], [wind.altitude for wind in profile])
+        for wind in profile:
+            self.assertAlmostEqual(sqrt(18), wind.speed, delta=0.3)
+            self.assertAlmostEqual(pi / 4, wind.direction, delta=0.05)
+
+    def test_straight_flight(self):
+        self.assertEqual([], circles(thermal(0, 0, period=100000)))
+
+    def test_day_profile(self):
+        files = ['../test/2015-07-09-Wispile.igc', '../test/2015-08-07-Fiesch.igc']
+        profile = day_profile(files, processes=2)
+        self.assertGreater(sum(wind.circles for wind in profile), 0)
+        for wind in profile:
+            self.assertLess(wind.speed, 15)
+            self.assertTrue(0 <= wind.direction < 2 * pi)
+
+if __name__ == '__main__':
+    unittest.main();